@@ -1,27 +1,60 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import io
 import os
 import re
+import sys
+import asyncio
 import csv
+import functools
 import time
 import json
+import atexit
 import argparse
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Set
+from typing import Dict, Iterator, List, Tuple, Optional, Set
 
-import requests
-from bs4 import BeautifulSoup
+import numpy as np
+import orjson
+import httpx
+import lxml.html
+from lxml import etree
 from plexapi.server import PlexServer
 from rapidfuzz import fuzz, process
 import yaml
 
+# ---------------------------
+# HTTP
+# ---------------------------
+
+# One pooled, keep-alive client for IMDb/Trakt/Radarr/Sonarr so repeated calls
+# to the same host skip the TCP/TLS handshake; HTTPS hosts that speak HTTP/2
+# multiplex concurrent requests over a single connection.
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+CLIENT = httpx.Client(http2=True, limits=HTTP_LIMITS, timeout=20.0, follow_redirects=True,
+                      headers={"User-Agent": "PlexTopListsAudit/1.0"})
+atexit.register(CLIENT.close)
+
 # ---------------------------
 # Helpers
 # ---------------------------
 
+# Compiled once; these run for every source and Plex title.
+_RE_SLUG      = re.compile(r'[^a-z0-9]+')
+_RE_APOS      = re.compile(r"[’'`]")
+_RE_PUNCT     = re.compile(r"[:!?.,&/()\-]+")
+_RE_WS        = re.compile(r"\s+")
+_RE_IMDB_HREF = re.compile(r'/title/(tt\d+)')
+_RE_YEAR      = re.compile(r'\((\d{4})\)')
+_RE_DIGITS    = re.compile(r'[^\d]')
+
 def slug(s: str) -> str:
-    return re.sub(r'[^a-z0-9]+', '-', s.lower()).strip('-')
+    return _RE_SLUG.sub('-', s.lower()).strip('-')
 
 def ensure_dir(p: Path):
     p.mkdir(parents=True, exist_ok=True)
@@ -33,6 +66,26 @@ def read_yaml(fp: str) -> dict:
 def log(msg: str):
     print(f"[+] {msg}")
 
+CACHE_TTL = 24 * 3600   # seconds
+
+def cache_load(fp: Optional[Path]) -> Optional[dict]:
+    if fp is None:
+        return None
+    try:
+        with open(fp, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def cache_save(fp: Optional[Path], data: dict):
+    if fp is None:
+        return
+    ensure_dir(fp.parent)
+    tmp = fp.with_name(fp.name + ".tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp, fp)
+
 # ---------------------------
 # IMDb Scraping (Top 250)
 # ---------------------------
@@ -40,75 +93,145 @@ def log(msg: str):
 IMDB_TOP250_MOVIES_URL = "https://www.imdb.com/chart/top/"
 IMDB_TOP250_TV_URL     = "https://www.imdb.com/chart/toptv/"
 
-def scrape_imdb_top250(url: str, kind: str) -> List[dict]:
-    """Return list of dicts with keys: title, year, imdb_id, kind (movie|show)."""
+def scrape_imdb_top250(url: str, kind: str, cache_dir: Optional[Path] = None, ttl: int = CACHE_TTL) -> List[dict]:
+    """
+    Return list of dicts with keys: title, year, imdb_id, kind (movie|show).
+    With cache_dir, a parse younger than ttl is reused as-is; an older one is
+    revalidated with If-None-Match/If-Modified-Since and kept on a 304.
+    """
+    cache_fp = cache_dir / f"imdb_{slug(url)}.json" if cache_dir else None
+    cached = cache_load(cache_fp)
+    if cached and not cached.get("items"):
+        cached = None   # never trust an empty parse
+    if cached and time.time() - cached.get("fetched", 0) < ttl:
+        return cached["items"]
+
     headers = {"Accept-Language": "en-US,en;q=0.9", "User-Agent": "Mozilla/5.0"}
-    r = requests.get(url, headers=headers, timeout=20)
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached and cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
+    r = CLIENT.get(url, headers=headers, timeout=20)
+    if cached and r.status_code == 304:
+        cached["fetched"] = time.time()
+        cache_save(cache_fp, cached)
+        return cached["items"]
     r.raise_for_status()
-    soup = BeautifulSoup(r.text, "html.parser")
+
+    items = parse_imdb_chart(r.content, kind)
+    # an empty parse means a layout change or a bot-check page; don't let it stick for the TTL
+    if items:
+        cache_save(cache_fp, {
+            "fetched": time.time(),
+            "etag": r.headers.get("ETag"),
+            "last_modified": r.headers.get("Last-Modified"),
+            "items": items,
+        })
+    return items
+
+def parse_imdb_chart(content: bytes, kind: str) -> List[dict]:
+    # IMDb's bot check can come back as a 2xx with no body; treat it like a page with no entries
+    if not content.strip():
+        return []
+    try:
+        doc = lxml.html.fromstring(content)
+    except etree.ParserError:
+        return []
 
     items = []
     # IMDb often puts entries in <li> under <ul data-testid="chart-layout-main"> (2025), but HTML can change.
     # We'll support both new and older layouts:
-    li_nodes = soup.select('ul[data-testid="chart-layout-main"] li')
+    li_nodes = doc.xpath('//ul[@data-testid="chart-layout-main"]/li')
     if not li_nodes:
         # fallback older table layout
-        rows = soup.select("tbody tr")
+        rows = doc.xpath("//tbody/tr")
         for tr in rows:
-            a = tr.select_one("a[href*='/title/tt']")
-            if not a:
+            links = tr.xpath(".//a[contains(@href, '/title/tt')]")
+            if not links:
                 continue
-            title = a.get_text(strip=True)
+            a = links[0]
+            title = a.text_content().strip()
             href = a.get("href", "")
-            m = re.search(r'/title/(tt\d+)', href)
+            m = _RE_IMDB_HREF.search(href)
             imdb_id = m.group(1) if m else None
             year = None
-            year_span = tr.select_one(".secondaryInfo")
-            if year_span and year_span.text:
-                year = re.sub(r'[^\d]', '', year_span.text)
+            year_txt = "".join(tr.xpath(".//*[contains(concat(' ', @class, ' '), ' secondaryInfo ')][1]//text()"))
+            if year_txt:
+                year = _RE_DIGITS.sub('', year_txt)
             items.append({"title": title, "year": year, "imdb_id": imdb_id, "kind": kind})
         return items
 
     for li in li_nodes:
-        a = li.select_one("a[href*='/title/tt']")
-        if not a:
+        links = li.xpath(".//a[contains(@href, '/title/tt')]")
+        if not links:
             continue
-        title = a.get_text(strip=True)
+        a = links[0]
+        title = a.text_content().strip()
         href = a.get("href", "")
-        m = re.search(r'/title/(tt\d+)', href)
+        m = _RE_IMDB_HREF.search(href)
         imdb_id = m.group(1) if m else None
 
         year = None
-        year_node = li.find(attrs={"data-testid": "chart-year"})
-        if year_node:
-            year = re.sub(r'[^\d]', '', year_node.get_text(strip=True))
+        year_nodes = li.xpath('.//*[@data-testid="chart-year"]')
+        if year_nodes:
+            year = _RE_DIGITS.sub('', year_nodes[0].text_content())
         else:
             # try alternative year markers
-            txt = li.get_text(" ", strip=True)
-            yrm = re.search(r'\((\d{4})\)', txt)
+            txt = " ".join(li.itertext())
+            yrm = _RE_YEAR.search(txt)
             year = yrm.group(1) if yrm else None
 
         items.append({"title": title, "year": year, "imdb_id": imdb_id, "kind": kind})
     return items
 
-def get_imdb_top250_movies() -> List[dict]:
-    return scrape_imdb_top250(IMDB_TOP250_MOVIES_URL, "movie")
+def get_imdb_top250_movies(cache_dir: Optional[Path] = None, ttl: int = CACHE_TTL) -> List[dict]:
+    return scrape_imdb_top250(IMDB_TOP250_MOVIES_URL, "movie", cache_dir, ttl)
 
-def get_imdb_top250_tv() -> List[dict]:
-    return scrape_imdb_top250(IMDB_TOP250_TV_URL, "show")
+def get_imdb_top250_tv(cache_dir: Optional[Path] = None, ttl: int = CACHE_TTL) -> List[dict]:
+    return scrape_imdb_top250(IMDB_TOP250_TV_URL, "show", cache_dir, ttl)
 
 # ---------------------------
 # Trakt API (optional lists)
 # ---------------------------
 
-def trakt_get(url: str, client_id: str, page: int = 1) -> requests.Response:
-    headers = {
+TRAKT_PAGE_LIMIT = 100
+TRAKT_CONCURRENCY = 5   # max in-flight page requests (Trakt rate limit)
+
+def trakt_headers(client_id: str) -> dict:
+    return {
         "Content-Type": "application/json",
         "trakt-api-version": "2",
         "trakt-api-key": client_id,
         "User-Agent": "PlexTopListsAudit/1.0"
     }
-    return requests.get(url, headers=headers, params={"page": page, "limit": 100}, timeout=20)
+
+def trakt_get(url: str, client_id: str, page: int = 1) -> httpx.Response:
+    return CLIENT.get(url, headers=trakt_headers(client_id),
+                      params={"page": page, "limit": TRAKT_PAGE_LIMIT}, timeout=20)
+
+async def _trakt_get_async(client: httpx.AsyncClient, url: str, client_id: str, page: int,
+                           sem: asyncio.Semaphore) -> Optional[list]:
+    async with sem:
+        resp = await client.get(url, headers=trakt_headers(client_id),
+                                params={"page": page, "limit": TRAKT_PAGE_LIMIT})
+    if resp.status_code == 404:
+        return None
+    resp.raise_for_status()
+    return orjson.loads(resp.content)
+
+async def _trakt_gather_pages(url: str, client_id: str, pages: List[int]) -> list:
+    sem = asyncio.Semaphore(TRAKT_CONCURRENCY)
+    async with httpx.AsyncClient(http2=True, limits=HTTP_LIMITS, timeout=20.0, follow_redirects=True) as client:
+        tasks = [_trakt_get_async(client, url, client_id, p, sem) for p in pages]
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+def trakt_fetch_pages(url: str, client_id: str, pages: List[int]) -> List[Optional[list]]:
+    """Fetch the given pages concurrently; results come back in page order."""
+    results = asyncio.run(_trakt_gather_pages(url, client_id, pages))
+    for r in results:
+        if isinstance(r, BaseException):
+            raise r
+    return results
 
 def fetch_trakt_list(user: str, slug: str, list_type: str, client_id: str) -> List[dict]:
     """
@@ -125,16 +248,36 @@ def fetch_trakt_list(user: str, slug: str, list_type: str, client_id: str) -> Li
         base = f"https://api.trakt.tv/users/{user}/lists/{slug}/items"
         kind = "mixed"
 
+    # Page 1 tells us whether (and usually how far) to paginate
+    resp = trakt_get(base, client_id, page=1)
+    if resp.status_code == 404:
+        return []
+    resp.raise_for_status()
+    first = orjson.loads(resp.content)
+    batches = [first] if first else []
+
+    if len(first or []) >= TRAKT_PAGE_LIMIT:
+        page_count = int(resp.headers.get("X-Pagination-Page-Count") or 0)
+        if page_count > 1:
+            batches += [b for b in trakt_fetch_pages(base, client_id, list(range(2, page_count + 1))) if b]
+        else:
+            # no pagination headers: probe a window of pages at a time until one comes back short
+            page = 2
+            done = False
+            while not done:
+                window = trakt_fetch_pages(base, client_id, list(range(page, page + TRAKT_CONCURRENCY)))
+                for batch in window:
+                    if not batch:
+                        done = True
+                        break
+                    batches.append(batch)
+                    if len(batch) < TRAKT_PAGE_LIMIT:
+                        done = True
+                        break
+                page += TRAKT_CONCURRENCY
+
     out = []
-    page = 1
-    while True:
-        resp = trakt_get(base, client_id, page=page)
-        if resp.status_code == 404:
-            break
-        resp.raise_for_status()
-        batch = resp.json()
-        if not batch:
-            break
+    for batch in batches:
         for it in batch:
             # mixed returns "type" and "movie"/"show" subobj
             tkind = kind
@@ -153,143 +296,239 @@ def fetch_trakt_list(user: str, slug: str, list_type: str, client_id: str) -> Li
                 "title": title,
                 "year": str(year) if year else None,
                 "imdb_id": ids.get("imdb"),
-                "tmdb_id": ids.get("tmdb"),
-                "tvdb_id": ids.get("tvdb"),
+                # numeric on Trakt; strings to match the ids parsed from Plex GUIDs
+                "tmdb_id": str(ids["tmdb"]) if ids.get("tmdb") else None,
+                "tvdb_id": str(ids["tvdb"]) if ids.get("tvdb") else None,
                 "kind": tkind
             })
-        # handle pagination
-        if len(batch) < 100:
-            break
-        page += 1
-        time.sleep(0.2)
     return out
 
 # ---------------------------
 # Plex Library
 # ---------------------------
 
-def gather_plex(plex_url: str, plex_token: str,
-                movie_sections: List[str],
-                show_sections: List[str]) -> Tuple[List[dict], List[dict]]:
-    plex = PlexServer(plex_url, plex_token)
-    movies = []
-    shows = []
-
-    def extract_ids_from_guids(guids) -> dict:
-        ids = {"imdb_id": None, "tmdb_id": None, "tvdb_id": None}
-        for g in guids or []:
-            uri = getattr(g, "id", "") or str(g)
-            # Examples:
-            # com.plexapp.agents.imdb://tt0111161?lang=en
-            # com.plexapp.agents.themoviedb://278?lang=en
-            # com.plexapp.agents.thetvdb://80348?lang=en
-            if "imdb://" in uri or "/title/tt" in uri or "tt" in uri:
-                m = re.search(r'(tt\d+)', uri)
-                if m: ids["imdb_id"] = m.group(1)
-            if "themoviedb://" in uri:
-                m = re.search(r'themoviedb://(\d+)', uri)
-                if m: ids["tmdb_id"] = m.group(1)
-            if "thetvdb://" in uri:
-                m = re.search(r'thetvdb://(\d+)', uri)
-                if m: ids["tvdb_id"] = m.group(1)
-        return ids
-
-    for sec_name in movie_sections:
-        sec = plex.library.section(sec_name)
-        for m in sec.all():
-            ids = extract_ids_from_guids(getattr(m, "guids", None))
-            movies.append({
-                "title": m.title,
-                "year": str(getattr(m, "year", "") or ""),
-                "imdb_id": ids["imdb_id"],
-                "tmdb_id": ids["tmdb_id"],
-                "tvdb_id": ids["tvdb_id"],
-                "ratingKey": m.ratingKey,
-                "kind": "movie",
-            })
+PLEX_PAGE_SIZE = 5000   # items per X-Plex-Container page
+
+# GUID agent name (last part of the scheme) -> id field
+_GUID_AGENTS = {
+    "imdb": "imdb_id",
+    "themoviedb": "tmdb_id",
+    "tmdb": "tmdb_id",
+    "thetvdb": "tvdb_id",
+    "tvdb": "tvdb_id",
+}
+
+def extract_ids_from_guids(guids) -> dict:
+    ids = {"imdb_id": None, "tmdb_id": None, "tvdb_id": None}
+    for g in guids or []:
+        uri = getattr(g, "id", "") or str(g)
+        # Examples:
+        # com.plexapp.agents.imdb://tt0111161?lang=en
+        # com.plexapp.agents.themoviedb://278?lang=en
+        # com.plexapp.agents.thetvdb://80348?lang=en
+        # imdb://tt0111161, tmdb://278, tvdb://80348 (Plex Movie/TV agents)
+        scheme, sep, rest = uri.partition("://")
+        if not sep:
+            continue
+        key = _GUID_AGENTS.get(scheme.rsplit(".", 1)[-1])
+        if not key:
+            continue
+        val = rest.split("?", 1)[0].split("/", 1)[0]
+        if not val:
+            continue
+        if key == "imdb_id" and not val.startswith("tt"):
+            val = "tt" + val
+        ids[key] = val
+    return ids
+
+def iter_plex_section(plex: PlexServer, sec, kind: str,
+                      cache_dir: Optional[Path] = None, ttl: int = CACHE_TTL) -> Iterator[dict]:
+    """
+    Yield a section's items straight from the /all XML, keeping only title, year,
+    ratingKey and GUIDs instead of building a PlexAPI object per item.
+    With cache_dir, a snapshot is reused while the section's updatedAt is
+    unchanged and the snapshot is younger than ttl.
+    """
+    cache_fp = cache_dir / f"plex_{plex.machineIdentifier}_{sec.key}.json" if cache_dir else None
+    updated_at = int(sec.updatedAt.timestamp()) if getattr(sec, "updatedAt", None) else None
+    cached = cache_load(cache_fp)
+    if (cached and updated_at and cached.get("updatedAt") == updated_at
+            and time.time() - cached.get("fetched", 0) < ttl):
+        yield from cached["items"]
+        return
 
-    for sec_name in show_sections:
-        sec = plex.library.section(sec_name)
-        for s in sec.all():
-            ids = extract_ids_from_guids(getattr(s, "guids", None))
-            shows.append({
-                "title": s.title,
-                "year": str(getattr(s, "year", "") or ""),
+    tag = "Video" if kind == "movie" else "Directory"
+    url = plex.url(f"/library/sections/{sec.key}/all")
+    seen = [] if cache_fp and updated_at else None   # kept only to write the snapshot
+    start = 0
+    while True:
+        headers = {
+            **plex._headers(),
+            "Accept": "application/xml",
+            "X-Plex-Container-Start": str(start),
+            "X-Plex-Container-Size": str(PLEX_PAGE_SIZE),
+        }
+        resp = plex._session.get(url, headers=headers, params={"includeGuids": 1}, timeout=plex._timeout)
+        resp.raise_for_status()
+
+        count = 0
+        for _, elem in etree.iterparse(io.BytesIO(resp.content), tag=tag):
+            count += 1
+            # legacy agents put their id in the guid attribute, newer ones in <Guid> children
+            guids = [g.get("id") for g in elem.iterfind("Guid")]
+            if elem.get("guid"):
+                guids.append(elem.get("guid"))
+            ids = extract_ids_from_guids(guids)
+            rating_key = elem.get("ratingKey")
+            it = {
+                "title": elem.get("title"),
+                "year": elem.get("year") or "",
                 "imdb_id": ids["imdb_id"],
                 "tmdb_id": ids["tmdb_id"],
                 "tvdb_id": ids["tvdb_id"],
-                "ratingKey": s.ratingKey,
-                "kind": "show",
-            })
+                "ratingKey": int(rating_key) if rating_key else None,
+                "kind": kind,
+            }
+            # drop the element and the already-processed siblings still hanging off MediaContainer
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+            if seen is not None:
+                seen.append(it)
+            yield it
+
+        if count < PLEX_PAGE_SIZE:
+            break
+        start += count
+
+    if seen is not None:
+        cache_save(cache_fp, {"fetched": time.time(), "updatedAt": updated_at, "items": seen})
 
-    return movies, shows
+def iter_plex(plex: PlexServer, sections: List[str], kind: str,
+              cache_dir: Optional[Path] = None, cache_ttl: int = CACHE_TTL) -> Iterator[dict]:
+    for sec_name in sections:
+        yield from iter_plex_section(plex, plex.library.section(sec_name), kind, cache_dir, cache_ttl)
 
 # ---------------------------
 # Matching
 # ---------------------------
 
+@functools.lru_cache(maxsize=65536)
 def normalize_title(t: str) -> str:
     t = t.lower().strip()
-    t = re.sub(r"[’'`]", "'", t)
-    t = re.sub(r"[:!?.,&/()\-]+", " ", t)
-    t = re.sub(r"\s+", " ", t)
+    t = _RE_APOS.sub("'", t)
+    t = _RE_PUNCT.sub(" ", t)
+    t = _RE_WS.sub(" ", t)
     return t
 
-def index_by_ids(items: List[dict]) -> Dict[str, dict]:
-    idx = {}
-    for it in items:
-        for key in ("imdb_id", "tmdb_id", "tvdb_id"):
-            val = it.get(key)
-            if val:
-                idx[f"{key}:{val}"] = it
-    return idx
-
-def build_title_year_index(items: List[dict]) -> Dict[Tuple[str, str], dict]:
-    d = {}
-    for it in items:
+class PlexIndex:
+    """ID, title+year and normalized-title lookups over Plex items, filled as items stream in."""
+
+    def __init__(self):
+        self.items: List[dict] = []
+        self.imdb: Dict[str, dict] = {}
+        self.tmdb: Dict[str, dict] = {}
+        self.tvdb: Dict[str, dict] = {}
+        self.title_year: Dict[Tuple[str, str], dict] = {}
+        self.by_norm: Dict[str, List[int]] = defaultdict(list)   # normalized title -> positions in items
+        self._choices: Optional[Tuple[List[str], List[int]]] = None
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def add(self, it: dict):
+        pos = len(self.items)
+        self.items.append(it)
+        if it.get("imdb_id"):
+            self.imdb[it["imdb_id"]] = it
+        if it.get("tmdb_id"):
+            self.tmdb[it["tmdb_id"]] = it
+        if it.get("tvdb_id"):
+            self.tvdb[it["tvdb_id"]] = it
         t = normalize_title(it["title"])
-        y = it.get("year") or ""
-        d[(t, y)] = it
-    return d
-
-def match_present(source: List[dict], plex_items: List[dict], fuzzy_threshold: int, prefer_ids: bool) -> Tuple[List[dict], List[dict]]:
-    """Return (present, missing) from source relative to plex_items."""
+        self.title_year[(t, it.get("year") or "")] = it
+        self.by_norm[t].append(pos)
+        self._choices = None
+
+    def fuzzy_choices(self) -> Tuple[List[str], List[int]]:
+        """Distinct normalized titles sorted by length, with their lengths."""
+        if self._choices is None:
+            titles = sorted(self.by_norm, key=len)
+            self._choices = (titles, [len(t) for t in titles])
+        return self._choices
+
+def wratio_length_window(length: int, threshold: float) -> Tuple[int, int]:
+    """
+    Inclusive range of title lengths that can still reach threshold with fuzz.WRatio
+    against a title of `length`. WRatio caps partial matches at 90 once the
+    longer/shorter ratio reaches 1.5, and at 60 once it exceeds 8.
+    """
+    if threshold > 90:
+        return length * 2 // 3 + 1, (length * 3 - 1) // 2
+    if threshold > 60:
+        return (length + 7) // 8, length * 8
+    return 0, sys.maxsize
+
+def match_present(source: List[dict], plex: PlexIndex, fuzzy_threshold: int, prefer_ids: bool) -> Tuple[List[dict], List[dict]]:
+    """Return (present, missing) from source relative to the indexed plex items."""
     present = []
     missing = []
 
-    id_index = index_by_ids(plex_items) if prefer_ids else {}
-    ty_index = build_title_year_index(plex_items)
-
-    # For fuzzy fallback precompute title list
-    plex_titles = [normalize_title(p["title"]) for p in plex_items]
+    matches: List[Optional[dict]] = []
+    unmatched = []  # positions in source left for the fuzzy pass
 
-    for s in source:
+    for i, s in enumerate(source):
         found = None
 
         # ID-first matching
         if prefer_ids:
-            for key in ("imdb_id", "tmdb_id", "tvdb_id"):
-                sid = s.get(key)
-                if sid and f"{key}:{sid}" in id_index:
-                    found = id_index[f"{key}:{sid}"]
-                    break
+            found = plex.imdb.get(s.get("imdb_id")) or plex.tmdb.get(s.get("tmdb_id")) or plex.tvdb.get(s.get("tvdb_id"))
 
         # Exact title+year
         if not found:
             ny = (normalize_title(s["title"]), s.get("year") or "")
-            found = ty_index.get(ny)
+            found = plex.title_year.get(ny)
 
-        # Fuzzy title+year
         if not found:
-            st = normalize_title(s["title"])
-            match = process.extractOne(st, plex_titles, scorer=fuzz.WRatio)
-            if match and match[1] >= fuzzy_threshold:
-                # grab first plex item whose normalized title equals match[0] and same year if possible
-                for p in plex_items:
-                    if normalize_title(p["title"]) == match[0] and ((s.get("year") and p.get("year") == s.get("year")) or not s.get("year")):
-                        found = p
+            unmatched.append(i)
+        matches.append(found)
+
+    # Fuzzy title+year: score leftover titles against the distinct Plex titles,
+    # sorted by length so each source length only sees the slice WRatio could pass
+    if unmatched and plex.by_norm:
+        choices, choice_lens = plex.fuzzy_choices()
+
+        by_len: Dict[int, List[int]] = defaultdict(list)
+        for i in unmatched:
+            by_len[len(normalize_title(source[i]["title"]))].append(i)
+
+        for length, rows in by_len.items():
+            min_len, max_len = wratio_length_window(length, fuzzy_threshold)
+            lo = bisect_left(choice_lens, min_len)
+            hi = bisect_right(choice_lens, max_len)
+            if lo >= hi:
+                continue
+            cand = choices[lo:hi]
+            src_titles = [normalize_title(source[i]["title"]) for i in rows]
+            scores = process.cdist(src_titles, cand, scorer=fuzz.WRatio,
+                                   score_cutoff=fuzzy_threshold, workers=-1)
+            for row, i in enumerate(rows):
+                sy = source[i].get("year")
+                row_scores = scores[row]
+                best = row_scores.max()
+                if best < fuzzy_threshold:
+                    continue
+                # only the top-scoring title(s); the year just picks among them, it never
+                # promotes a worse title (any year if source has none)
+                for c in np.flatnonzero(row_scores == best):
+                    for j in plex.by_norm[cand[c]]:
+                        if not sy or plex.items[j].get("year") == sy:
+                            matches[i] = plex.items[j]
+                            break
+                    if matches[i]:
                         break
 
+    for s, found in zip(source, matches):
         if found:
             present.append({**s, "_matched_ratingKey": found.get("ratingKey")})
         else:
@@ -297,35 +536,102 @@ def match_present(source: List[dict], plex_items: List[dict], fuzzy_threshold: i
 
     return present, missing
 
+def dedupe(items: List[dict], id_keys: Tuple[str, ...]) -> List[dict]:
+    """Drop repeats of the same title across source lists, keyed on the first id present, else title+year."""
+    seen: Set[tuple] = set()
+    out = []
+    for it in items:
+        key = next(((k, it[k]) for k in id_keys if it.get(k)), None) \
+            or ("title", normalize_title(it["title"]), it.get("year") or "")
+        if key in seen:
+            continue
+        seen.add(key)
+        out.append(it)
+    return out
+
 # ---------------------------
 # Radarr / Sonarr (optional)
 # ---------------------------
 
+class RateLimiter:
+    """Spaces calls to one server at most `rate` per second, shared across threads."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(self._next, now)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+_RATE_LIMITERS: Dict[str, RateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+def rate_limiter(key: str, rate: float) -> RateLimiter:
+    with _RATE_LIMITERS_LOCK:
+        if key not in _RATE_LIMITERS:
+            _RATE_LIMITERS[key] = RateLimiter(rate)
+        return _RATE_LIMITERS[key]
+
+def run_parallel(fn, items: List[dict], max_workers: int) -> List[dict]:
+    """
+    Run fn over items on a thread pool; collect the non-empty results.
+    A title whose request fails is logged and skipped; any other error
+    cancels the titles not yet started before it propagates.
+    """
+    def _one(it: dict) -> Optional[dict]:
+        try:
+            return fn(it)
+        except (httpx.HTTPError, ValueError) as e:
+            log(f"Skipping {it.get('title')} ({it.get('year') or '?'}): {e}")
+            return None
+
+    out = []
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as ex:
+        futures = [ex.submit(_one, it) for it in items]
+        try:
+            for f in as_completed(futures):
+                res = f.result()
+                if res:
+                    out.append(res)
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+    return out
+
 def radarr_add_missing(radarr_cfg: dict, movies: List[dict]) -> List[dict]:
     if not movies:
         return []
     url = radarr_cfg["url"].rstrip("/")
     api = radarr_cfg["api_key"]
     headers = {"X-Api-Key": api, "Content-Type": "application/json"}
-    added = []
+    limiter = rate_limiter(url, float(radarr_cfg.get("rate_limit", 10)))
 
-    for m in movies:
+    def _add_one(m: dict) -> Optional[dict]:
         imdb = m.get("imdb_id")
         tmdb = m.get("tmdb_id")
 
         # Look up by IMDb first
         look_term = f"imdb:{imdb}" if imdb else (f"tmdb:{tmdb}" if tmdb else f"{m['title']} ({m.get('year','')})")
-        lr = requests.get(f"{url}/api/v3/movie/lookup", params={"term": look_term}, headers=headers, timeout=20)
+        limiter.wait()
+        lr = CLIENT.get(f"{url}/api/v3/movie/lookup", params={"term": look_term}, headers=headers, timeout=20)
         if lr.status_code != 200:
-            continue
-        candidates = lr.json()
+            return None
+        candidates = orjson.loads(lr.content)
         if not candidates:
             # fallback plain search
-            lr = requests.get(f"{url}/api/v3/movie/lookup", params={"term": m['title']}, headers=headers, timeout=20)
-            candidates = lr.json()
+            limiter.wait()
+            lr = CLIENT.get(f"{url}/api/v3/movie/lookup", params={"term": m['title']}, headers=headers, timeout=20)
+            candidates = orjson.loads(lr.content)
 
         if not candidates:
-            continue
+            return None
 
         cand = candidates[0]
         payload = {
@@ -345,11 +651,13 @@ def radarr_add_missing(radarr_cfg: dict, movies: List[dict]) -> List[dict]:
             "path": os.path.join(radarr_cfg["root_folder_path"], cand.get("title") or m["title"])
         }
 
-        ar = requests.post(f"{url}/api/v3/movie", headers=headers, data=json.dumps(payload), timeout=20)
+        limiter.wait()
+        ar = CLIENT.post(f"{url}/api/v3/movie", headers=headers, content=orjson.dumps(payload), timeout=20)
         if ar.status_code in (200, 201):
-            added.append({"title": m["title"], "year": m.get("year"), "imdb_id": imdb, "tmdb_id": m.get("tmdb_id")})
-        time.sleep(0.2)
-    return added
+            return {"title": m["title"], "year": m.get("year"), "imdb_id": imdb, "tmdb_id": m.get("tmdb_id")}
+        return None
+
+    return run_parallel(_add_one, movies, int(radarr_cfg.get("concurrency", 8)))
 
 def sonarr_add_missing(sonarr_cfg: dict, shows: List[dict]) -> List[dict]:
     if not shows:
@@ -357,21 +665,23 @@ def sonarr_add_missing(sonarr_cfg: dict, shows: List[dict]) -> List[dict]:
     url = sonarr_cfg["url"].rstrip("/")
     api = sonarr_cfg["api_key"]
     headers = {"X-Api-Key": api, "Content-Type": "application/json"}
-    added = []
+    limiter = rate_limiter(url, float(sonarr_cfg.get("rate_limit", 10)))
 
-    for s in shows:
+    def _add_one(s: dict) -> Optional[dict]:
         # Prefer TVDB for Sonarr
         term = f"tvdb:{s.get('tvdb_id')}" if s.get('tvdb_id') else (f"imdb:{s.get('imdb_id')}" if s.get('imdb_id') else s['title'])
-        lr = requests.get(f"{url}/api/v3/series/lookup", params={"term": term}, headers=headers, timeout=20)
+        limiter.wait()
+        lr = CLIENT.get(f"{url}/api/v3/series/lookup", params={"term": term}, headers=headers, timeout=20)
         if lr.status_code != 200:
-            continue
-        candidates = lr.json()
+            return None
+        candidates = orjson.loads(lr.content)
         if not candidates:
             # fallback title search
-            lr = requests.get(f"{url}/api/v3/series/lookup", params={"term": s["title"]}, headers=headers, timeout=20)
-            candidates = lr.json()
+            limiter.wait()
+            lr = CLIENT.get(f"{url}/api/v3/series/lookup", params={"term": s["title"]}, headers=headers, timeout=20)
+            candidates = orjson.loads(lr.content)
         if not candidates:
-            continue
+            return None
 
         cand = candidates[0]
         payload = {
@@ -391,11 +701,13 @@ def sonarr_add_missing(sonarr_cfg: dict, shows: List[dict]) -> List[dict]:
         }
         # Sonarr v3 ignores languageProfileId; it’s okay if present.
 
-        ar = requests.post(f"{url}/api/v3/series", headers=headers, data=json.dumps(payload), timeout=20)
+        limiter.wait()
+        ar = CLIENT.post(f"{url}/api/v3/series", headers=headers, content=orjson.dumps(payload), timeout=20)
         if ar.status_code in (200, 201):
-            added.append({"title": s["title"], "year": s.get("year"), "tvdb_id": s.get("tvdb_id"), "imdb_id": s.get("imdb_id")})
-        time.sleep(0.2)
-    return added
+            return {"title": s["title"], "year": s.get("year"), "tvdb_id": s.get("tvdb_id"), "imdb_id": s.get("imdb_id")}
+        return None
+
+    return run_parallel(_add_one, shows, int(sonarr_cfg.get("concurrency", 8)))
 
 # ---------------------------
 # Reporting
@@ -405,50 +717,52 @@ def write_csv(path: Path, rows: List[dict], fieldnames: List[str]):
     if not rows:
         return
     with open(path, "w", encoding="utf-8", newline="") as f:
-        w = csv.DictWriter(f, fieldnames=fieldnames)
+        w = csv.DictWriter(f, fieldnames=fieldnames, extrasaction="ignore")
         w.writeheader()
-        for r in rows:
-            w.writerow({k: r.get(k) for k in fieldnames})
+        w.writerows(rows)
 
 def write_markdown_report(path: Path, sections: List[Tuple[str, List[dict]]]):
+    parts = [
+        "# Plex Top Lists Audit\n\n",
+        f"_Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}_\n\n",
+    ]
+    for title, rows in sections:
+        parts.append(f"## {title}\n\n")
+        if not rows:
+            parts.append("All caught up! ✅\n\n")
+            continue
+        parts.append("| Title | Year | IMDb | TMDb | TVDB |\n")
+        parts.append("|---|---:|---|---|---|\n")
+        for r in rows:
+            imdb = f"[{r.get('imdb_id')}]({'https://www.imdb.com/title/'+r['imdb_id']+'/'})" if r.get('imdb_id') else ""
+            tmdb = f"[{r.get('tmdb_id')}]({'https://www.themoviedb.org/'+('movie' if r.get('kind')=='movie' else 'tv')+'/'+str(r['tmdb_id'])})" if r.get('tmdb_id') else ""
+            tvdb = f"[{r.get('tvdb_id')}]({'https://thetvdb.com/?id='+str(r['tvdb_id'])})" if r.get('tvdb_id') else ""
+            parts.append(f"| {r.get('title','')} | {r.get('year','')} | {imdb} | {tmdb} | {tvdb} |\n")
+        parts.append("\n")
     with open(path, "w", encoding="utf-8") as f:
-        f.write(f"# Plex Top Lists Audit\n\n")
-        f.write(f"_Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}_\n\n")
-        for title, rows in sections:
-            f.write(f"## {title}\n\n")
-            if not rows:
-                f.write("All caught up! ✅\n\n")
-                continue
-            f.write("| Title | Year | IMDb | TMDb | TVDB |\n")
-            f.write("|---|---:|---|---|---|\n")
-            for r in rows:
-                imdb = f"[{r.get('imdb_id')}]({'https://www.imdb.com/title/'+r['imdb_id']+'/'})" if r.get('imdb_id') else ""
-                tmdb = f"[{r.get('tmdb_id')}]({'https://www.themoviedb.org/'+('movie' if r.get('kind')=='movie' else 'tv')+'/'+str(r['tmdb_id'])})" if r.get('tmdb_id') else ""
-                tvdb = f"[{r.get('tvdb_id')}]({'https://thetvdb.com/?id='+str(r['tvdb_id'])})" if r.get('tvdb_id') else ""
-                f.write(f"| {r.get('title','')} | {r.get('year','')} | {imdb} | {tmdb} | {tvdb} |\n")
-            f.write("\n")
+        f.write("".join(parts))
 
 # ---------------------------
 # Main
 # ---------------------------
 
-def main():
-    ap = argparse.ArgumentParser(description="Audit Plex against IMDb/Trakt top lists and optionally add missing to Radarr/Sonarr.")
-    ap.add_argument("-c", "--config", default="config.media.yaml", help="Path to YAML config.")
-    args = ap.parse_args()
-
-    cfg = read_yaml(args.config)
-    outdir = Path(cfg.get("output", {}).get("dir", "./out"))
-    ensure_dir(outdir)
-
+def compare_sources(cfg: dict, outdir: Path, cache_dir: Optional[Path],
+                    cache_ttl: int) -> Tuple[List[Tuple[str, List[dict]]], List[dict], List[dict]]:
+    """
+    Index Plex, fetch every configured source list and match it, writing the
+    per-list CSVs. Returns (report sections, missing movies, missing shows);
+    the Plex indexes and source lists go away when this returns.
+    """
     # Gather Plex library
     log("Connecting to Plex and pulling library…")
-    movies, shows = gather_lex = gather_plex(
-        cfg["plex"]["url"],
-        cfg["plex"]["token"],
-        cfg["plex"].get("movie_sections", ["Movies"]),
-        cfg["plex"].get("show_sections", ["TV Shows"])
-    )
+    plex = PlexServer(cfg["plex"]["url"], cfg["plex"]["token"])
+    movies = PlexIndex()
+    for it in iter_plex(plex, cfg["plex"].get("movie_sections", ["Movies"]), "movie", cache_dir, cache_ttl):
+        movies.add(it)
+    shows = PlexIndex()
+    for it in iter_plex(plex, cfg["plex"].get("show_sections", ["TV Shows"]), "show", cache_dir, cache_ttl):
+        shows.add(it)
+    log(f"Plex: {len(movies)} movies, {len(shows)} shows")
 
     matching_cfg = cfg.get("matching", {})
     fuzzy_threshold = int(matching_cfg.get("fuzzy_threshold", 90))
@@ -456,30 +770,36 @@ def main():
 
     # Build source lists
     sources_cfg = cfg.get("sources", {})
-    src_bundles = []  # (name, items)
+    src_bundles = []  # (name, items, kind) -- kind is None when the list mixes movies and shows
     if sources_cfg.get("imdb_top250_movies", False):
         log("Fetching IMDb Top 250 Movies…")
-        src_bundles.append(("IMDb Top 250 Movies", get_imdb_top250_movies()))
+        src_bundles.append(("IMDb Top 250 Movies", get_imdb_top250_movies(cache_dir, cache_ttl), "movie"))
     if sources_cfg.get("imdb_top250_tv", False):
         log("Fetching IMDb Top 250 TV…")
-        src_bundles.append(("IMDb Top 250 TV", get_imdb_top250_tv()))
+        src_bundles.append(("IMDb Top 250 TV", get_imdb_top250_tv(cache_dir, cache_ttl), "show"))
 
     trakt_cfg = sources_cfg.get("trakt")
     if trakt_cfg and trakt_cfg.get("client_id") and trakt_cfg.get("user_lists"):
         for li in trakt_cfg["user_lists"]:
             log(f"Fetching Trakt list: {li['user']}/{li['slug']} ({li['type']})…")
             items = fetch_trakt_list(li["user"], li["slug"], li["type"], trakt_cfg["client_id"])
-            src_bundles.append((f"Trakt: {li['user']}/{li['slug']}", items))
+            list_kind = {"movies": "movie", "shows": "show"}.get(li["type"])
+            src_bundles.append((f"Trakt: {li['user']}/{li['slug']}", items, list_kind))
 
     # Compare & Collect results
     all_sections_md = []
     radarr_missing_movies = []
     sonarr_missing_shows = []
 
-    for name, items in src_bundles:
-        # split by kind for matching
-        src_movies = [x for x in items if x.get("kind") == "movie"]
-        src_shows  = [x for x in items if x.get("kind") == "show"]
+    for name, items, list_kind in src_bundles:
+        # split by kind for matching; only mixed lists need the per-item check
+        if list_kind == "movie":
+            src_movies, src_shows = items, []
+        elif list_kind == "show":
+            src_movies, src_shows = [], items
+        else:
+            src_movies = [x for x in items if x.get("kind") == "movie"]
+            src_shows  = [x for x in items if x.get("kind") == "show"]
 
         present_movies, missing_movies = match_present(src_movies, movies, fuzzy_threshold, prefer_ids)
         present_shows,  missing_shows  = match_present(src_shows,  shows,  fuzzy_threshold, prefer_ids)
@@ -501,6 +821,30 @@ def main():
         radarr_missing_movies += missing_movies
         sonarr_missing_shows  += missing_shows
 
+    return all_sections_md, radarr_missing_movies, sonarr_missing_shows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Audit Plex against IMDb/Trakt top lists and optionally add missing to Radarr/Sonarr.")
+    ap.add_argument("-c", "--config", default="config.media.yaml", help="Path to YAML config.")
+    args = ap.parse_args()
+
+    cfg = read_yaml(args.config)
+    outdir = Path(cfg.get("output", {}).get("dir", "./out"))
+    ensure_dir(outdir)
+
+    cache_cfg = cfg.get("cache", {})
+    cache_dir = outdir / ".cache" if cache_cfg.get("enabled", True) else None
+    cache_ttl = int(float(cache_cfg.get("ttl_hours", 24)) * 3600)
+
+    # Plex indexes and source lists only live inside compare_sources,
+    # so just the missing lists stay around for the slow add phase
+    all_sections_md, radarr_missing_movies, sonarr_missing_shows = compare_sources(cfg, outdir, cache_dir, cache_ttl)
+
+    # The same title often shows up on several lists; only look it up once
+    radarr_missing_movies = dedupe(radarr_missing_movies, ("imdb_id", "tmdb_id"))
+    sonarr_missing_shows  = dedupe(sonarr_missing_shows, ("tvdb_id", "imdb_id"))
+
     # Write MD report
     if cfg.get("output", {}).get("write_markdown", True):
         write_markdown_report(outdir / "report.md", all_sections_md)